@@ -3,7 +3,9 @@ import yaml
 import time
 import json
 from datetime import datetime
+import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 class OscilloscopeMeasurement:
@@ -15,6 +17,9 @@ class OscilloscopeMeasurement:
         self.pressure_url = "http://localhost:8001"
         self.current_measurement_path = None
 
+        # Consecutive failed trigger status polls tolerated before the run is aborted
+        self.max_status_errors = self.config.get('measurement', {}).get('max_status_errors', 50)
+
     def setup_folders(self):
         # Create base folder structure
         base_path = Path(self.config['oscilloscope']['save_path'])
@@ -39,6 +44,41 @@ class OscilloscopeMeasurement:
         # Save gap information to a JSON file
         self.save_gap_info()
 
+    def resume_folders(self, run_path):
+        """Reuse an existing run folder and the configuration the run was started with."""
+        self.current_measurement_path = Path(run_path)
+        if not (self.current_measurement_path / "data").is_dir():
+            raise ValueError(f"{run_path} is not a measurement run folder")
+
+        # The config file may have been edited or deleted (sweep runs) since the run started
+        readme_file = self.current_measurement_path / "README.json"
+        if not readme_file.exists():
+            raise ValueError(f"{run_path} has no README.json with the run configuration")
+        with open(readme_file, 'r') as f:
+            self.config = json.load(f)["configuration"]
+        self.max_status_errors = self.config.get('measurement', {}).get('max_status_errors', 50)
+
+    def load_checkpoint(self):
+        """Return the next capture number recorded in the run folder (0 if none)."""
+        checkpoint_file = self.current_measurement_path / "checkpoint.json"
+        if not checkpoint_file.exists():
+            return 0
+        with open(checkpoint_file, 'r') as f:
+            return json.load(f)["next_capture"]
+
+    def save_checkpoint(self, next_capture):
+        checkpoint = {
+            "timestamp": datetime.now().isoformat(),
+            "next_capture": next_capture,
+            "total_captures": self.config['measurement']['captures']
+        }
+        # Write to a temporary file first so an interrupted write never corrupts the checkpoint
+        checkpoint_file = self.current_measurement_path / "checkpoint.json"
+        temp_file = checkpoint_file.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temp_file, checkpoint_file)
+
     def save_gap_info(self):
         """Save the gap information to a JSON file in the run folder."""
         if self.current_measurement_path:
@@ -95,35 +135,34 @@ class OscilloscopeMeasurement:
             return None
 
 
-    def configure_scope(self):
-        # Configure channels
-        for channel in self.config['channels']:
-            response = requests.post(
-                f"{self.base_url}/channel/{channel['number']}", 
-                json={
+    def configure_scope(self, previous=None):
+        """Send the scope configuration; given the previous config, only what changed."""
+        if previous is not None and previous.get('acquisition') != self.config['acquisition']:
+            # A memory depth change resets the scope, so nothing else can be assumed to persist
+            previous = None
+        # The server expands this into one batch of SCPI writes (channels, acquisition,
+        # timebase, trigger last), so the whole setup is a single request
+        payload = {
+            "channels": [
+                {
                     "channel": channel['number'],
                     "scale": channel['scale'],
                     "coupling": channel['coupling'],
                     "display": channel['display']
                 }
-            )
-            response.raise_for_status()
-
-        # Configure acquisition first (before trigger)
-        response = requests.post(
-            f"{self.base_url}/acquisition",
-            json=self.config['acquisition']
-        )
-        response.raise_for_status()
+                for channel in self.config['channels']
+                if previous is None or channel not in previous['channels']
+            ]
+        }
+        for section in ('acquisition', 'timebase', 'trigger'):
+            if previous is None or previous.get(section) != self.config[section]:
+                payload[section] = self.config[section]
 
-        # Configure timebase
-        response = requests.post(
-            f"{self.base_url}/timebase",
-            json=self.config['timebase']
-        )
+        response = requests.post(f"{self.base_url}/configure", json=payload)
         response.raise_for_status()
+        return response.json()
 
-        # Configure trigger last
+    def arm_trigger(self):
         response = requests.post(
             f"{self.base_url}/trigger",
             json=self.config['trigger']
@@ -131,29 +170,81 @@ class OscilloscopeMeasurement:
         response.raise_for_status()
 
     def wait_for_trigger(self):
+        """Block until the scope has triggered.
+
+        Returns the scope server's monotonic time of the first status poll that saw
+        STOP, or None if the server does not report one.
+        """
         # First, re-arm the trigger
-        requests.post(
-            f"{self.base_url}/trigger",
-            json=self.config['trigger']
-        )
+        self.arm_trigger()
+        errors = 0
         while True:
-            response = requests.get(f"{self.base_url}/trigger/status")
-            status = response.json()['status']
+            try:
+                response = requests.get(f"{self.base_url}/trigger/status")
+                response.raise_for_status()
+                status_data = response.json()
+                status = status_data['status']
+            except requests.RequestException as e:
+                # The server reconnects to the scope on its own; back off and re-arm once it is back
+                errors += 1
+                if errors >= self.max_status_errors:
+                    raise
+                print(f"Warning: Trigger status unavailable ({errors}/{self.max_status_errors}): {str(e)}")
+                time.sleep(min(0.1 * 2 ** errors, 5.0))
+                try:
+                    self.arm_trigger()
+                except requests.RequestException:
+                    pass
+                continue
+            errors = 0
+            if status_data.get('reconnected'):
+                # The scope came back unarmed, so a STOP now would be stale
+                print("Warning: Oscilloscope reconnected, re-arming trigger")
+                self.arm_trigger()
+                continue
             if status == "STOP":  # Triggered and acquired
-                return True
+                # Never substitute the client's clock: it is not comparable with the servers'
+                return status_data.get('monotonic')
             time.sleep(0.1)
 
-    def save_capture(self, capture_num):
+    def get_channel_data(self, channel):
+        response = requests.get(
+            f"{self.base_url}/data/{channel['number']}",
+            params={"points": self.config['acquisition']['points']}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def save_capture(self, capture_num, trigger_time=None):
         # Create a metadata dictionary
         metadata = {
             "timestamp": datetime.now().isoformat(),
             "channels": {}
         }
+        if trigger_time is not None:
+            metadata["trigger_monotonic"] = trigger_time
+            metadata["trigger_monotonic_note"] = (
+                "Scope server monotonic time of the first status poll that saw STOP; "
+                "up to ~100 ms after the actual trigger"
+            )
+
+        enabled_channels = [ch for ch in self.config['channels'] if ch['display']]  # Only capture enabled channels
+
+        # Fetch the pressure reading and all channels at once instead of one after another
+        with ThreadPoolExecutor(max_workers=len(enabled_channels) + 1) as pool:
+            pressure_future = pool.submit(self.get_pressure_reading)
+            channel_futures = {
+                channel['number']: pool.submit(self.get_channel_data, channel)
+                for channel in enabled_channels
+            }
 
         # Get pressure reading for this capture
-        pressure_data = self.get_pressure_reading()
+        pressure_data = pressure_future.result()
         if pressure_data:
             metadata["pressure"] = pressure_data
+            if trigger_time is not None and 'monotonic' in pressure_data:
+                # Positive when the pressure was sampled after the trigger
+                metadata["pressure_trigger_offset"] = pressure_data['monotonic'] - trigger_time
         
         # Dictionary to store data for all channels
         all_channel_data = {}
@@ -161,29 +252,30 @@ class OscilloscopeMeasurement:
         time_step = None
         
         # First collect all data and metadata
-        for channel in self.config['channels']:
-            if channel['display']:  # Only capture enabled channels
-                try:
-                    response = requests.get(
-                        f"{self.base_url}/data/{channel['number']}",
-                        params={"points": self.config['acquisition']['points']}
-                    )
-                    response.raise_for_status()
-                    response_data = response.json()
-                    
-                    # Store channel metadata
-                    metadata["channels"][f"channel_{channel['number']}"] = {
-                        "time_step": response_data['time_step'],
-                        "scale": channel['scale'],
-                        "coupling": channel['coupling']
-                    }
-                    
-                    # Store channel data
-                    all_channel_data[channel['number']] = response_data['data']
-                    max_points = max(max_points, len(response_data['data']))
-                    
-                except Exception as e:
-                    print(f"Warning: Failed to capture channel {channel['number']}: {str(e)}")
+        for channel in enabled_channels:
+            try:
+                response_data = channel_futures[channel['number']].result()
+                
+                # Store channel metadata
+                metadata["channels"][f"channel_{channel['number']}"] = {
+                    "time_step": response_data['time_step'],
+                    "transfer_monotonic": response_data.get('transfer_monotonic'),
+                    "scale": channel['scale'],
+                    "coupling": channel['coupling']
+                }
+                
+                # Store channel data
+                all_channel_data[channel['number']] = response_data['data']
+                max_points = max(max_points, len(response_data['data']))
+                
+            except Exception as e:
+                print(f"Warning: Failed to capture channel {channel['number']}: {str(e)}")
+
+        # An incomplete capture must not be saved and checkpointed, otherwise a resumed
+        # run would never retake it
+        missing = [ch['number'] for ch in enabled_channels if ch['number'] not in all_channel_data]
+        if missing:
+            raise RuntimeError(f"Capture {capture_num} is missing channels {missing}")
         
         # Save metadata to JSON
         metadata_file = self.current_measurement_path / "data" / f"capture_{capture_num:04d}_metadata.json"
@@ -240,13 +332,39 @@ class OscilloscopeMeasurement:
             print(f"Warning: Failed to disconnect pressure device: {str(e)}")
 
 
-    def run_measurement(self):
-        try:
-            print("Setting up measurement folders...")
-            self.setup_folders()
+    def validate_channels(self):
+        enabled_channels = [ch for ch in self.config['channels'] if ch['display']]
+        if not enabled_channels:
+            raise ValueError("No channels are enabled in the configuration")
+        print(f"Configured channels: {[ch['number'] for ch in enabled_channels]}")
+
+    def run_captures(self, start_capture=0):
+        print("Starting captures...")
+        for capture_num in range(start_capture, self.config['measurement']['captures']):
+            print(f"\nCapture {capture_num + 1}/{self.config['measurement']['captures']}...")
+            trigger_time = self.wait_for_trigger()
+            
+            print("Saving capture data...")
+            self.save_capture(capture_num, trigger_time)
+            self.save_checkpoint(capture_num + 1)
             
-            print("Saving initial configuration...")
-            self.save_config()
+            # Wait for specified interval
+            if capture_num < self.config['measurement']['captures'] - 1:  # Don't wait after last capture
+                time.sleep(self.config['measurement']['interval'])
+
+    def run_measurement(self, resume_path=None):
+        try:
+            if resume_path:
+                print(f"Resuming measurement in {resume_path}...")
+                self.resume_folders(resume_path)
+                start_capture = self.load_checkpoint()
+            else:
+                print("Setting up measurement folders...")
+                self.setup_folders()
+                start_capture = 0
+
+                print("Saving initial configuration...")
+                self.save_config()
             
             print("Connecting to oscilloscope...")
             self.connect_scope()
@@ -254,27 +372,17 @@ class OscilloscopeMeasurement:
             print("Connecting to pressure device...")
             self.connect_pressure_device()
             
-            # Validate channel configuration
-            enabled_channels = [ch for ch in self.config['channels'] if ch['display']]
-            if not enabled_channels:
-                raise ValueError("No channels are enabled in the configuration")
-            print(f"Configured channels: {[ch['number'] for ch in enabled_channels]}")
+            self.validate_channels()
             
             print("Configuring scope...")
             self.configure_scope()
             
-            print("Starting captures...")
-            for capture_num in range(self.config['measurement']['captures']):
-                print(f"\nCapture {capture_num + 1}/{self.config['measurement']['captures']}...")
-                self.wait_for_trigger()
-                
-                print("Saving capture data...")
-                self.save_capture(capture_num)
-                
-                # Wait for specified interval
-                if capture_num < self.config['measurement']['captures'] - 1:  # Don't wait after last capture
-                    time.sleep(self.config['measurement']['interval'])
-            
+            self.run_captures(start_capture)
+
+        except Exception:
+            if self.current_measurement_path:
+                print(f"Measurement interrupted. Resume with: python automated_measurement.py {self.current_measurement_path}")
+            raise
         finally:
             print("Disconnecting from oscilloscope...")
             self.disconnect_scope()
@@ -284,4 +392,4 @@ class OscilloscopeMeasurement:
 
 if __name__ == "__main__":
     measurement = OscilloscopeMeasurement("config.yaml")
-    measurement.run_measurement() 
\ No newline at end of file
+    measurement.run_measurement(sys.argv[1] if len(sys.argv) > 1 else None) 
\ No newline at end of file
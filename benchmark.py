@@ -0,0 +1,329 @@
+import argparse
+import copy
+import json
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import requests
+import uvicorn
+import yaml
+
+import main
+import preassure_main
+from automated_measurement import OscilloscopeMeasurement
+
+DEFAULT_DEPTHS = [10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_CHANNELS = [1, 2, 4]
+DEFAULT_CLIENTS = [1, 2, 4]
+DEFAULT_FORMATS = ["ASC"]  # the only waveform format main.py transfers today
+
+# A 1M-point ASCII /data fetch takes seconds, so large depths run fewer iterations
+LARGE_DEPTH = 1_000_000
+
+
+class FakeScope:
+    """Stand-in for the pyvisa oscilloscope resource, answering the SCPI subset main.py uses."""
+
+    def __init__(self):
+        self.timeout = 5000
+        self.read_termination = '\n'
+        self.write_termination = '\n'
+        self.memory_depth = 1_000_000
+        self.points = None
+        self.time_step = 1e-9
+        self._waveforms = {}
+
+    def waveform(self, points):
+        # Formatting 10M points as text is slow, so each depth is generated once
+        if points not in self._waveforms:
+            samples = np.sin(np.linspace(0, 20 * np.pi, points)) + 0.01 * np.random.randn(points)
+            self._waveforms[points] = ','.join(f"{v:.6e}" for v in samples) + ','
+        return self._waveforms[points]
+
+    def write(self, message):
+        # Compound messages from /scpi/batch arrive joined with ';'
+        for command in message.split(';'):
+            if command.startswith(':ACQuire:MDEPth'):
+                self.memory_depth = int(command.split()[1])
+            elif command.startswith(':WAV:POIN'):
+                value = command.split()[1]
+                self.points = self.memory_depth if value == "max" else int(value)
+
+    def query(self, message):
+        *commands, command = message.split(';')
+        if commands:
+            self.write(';'.join(commands))
+        if command == '*IDN?':
+            return "BENCHMARK,FakeScope,0,0"
+        if command == ':TRIG:STAT?':
+            return "STOP"
+        if command == ':WAV:XINC?':
+            return str(self.time_step)
+        if command == ':WAV:DATA?':
+            return self.waveform(self.points or self.memory_depth)
+        return ""
+
+    def close(self):
+        pass
+
+
+class FakeGauge:
+    """Stand-in for the serial pressure gauge used by preassure_main.py."""
+
+    def __init__(self):
+        self._buffer = b''
+
+    @property
+    def bytes_in_buffer(self):
+        return len(self._buffer)
+
+    def read_bytes(self, count):
+        data, self._buffer = self._buffer[:count], self._buffer[count:]
+        return data
+
+    def write(self, command):
+        self._buffer += b'\x06\r\n'  # ACK
+
+    def write_raw(self, data):
+        if data == b'\x05':  # ENQ
+            self._buffer += b'0, 1.0000E-03\r\n'
+
+    def close(self):
+        pass
+
+
+class BackgroundServer(uvicorn.Server):
+    def install_signal_handlers(self):
+        # Signal handlers can only be installed from the main thread
+        pass
+
+
+def start_server(app, port):
+    server = BackgroundServer(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def summarize(latencies, total_bytes, elapsed):
+    return {
+        "operations": len(latencies),
+        "captures_per_s": len(latencies) / elapsed,
+        "mb_per_s": total_bytes / elapsed / 1e6,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)) * 1e3,
+            "p90": float(np.percentile(latencies, 90)) * 1e3,
+            "p99": float(np.percentile(latencies, 99)) * 1e3,
+            "max": max(latencies) * 1e3
+        }
+    }
+
+
+def run_clients(operation, clients, iterations):
+    """Run operation() iterations times on each of clients threads; operation returns bytes moved."""
+    def worker():
+        results = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            size = operation()
+            results.append((time.perf_counter() - start, size))
+        return results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(worker) for _ in range(clients)]
+        samples = [sample for future in futures for sample in future.result()]
+    elapsed = time.perf_counter() - start
+    return summarize([s[0] for s in samples], sum(s[1] for s in samples), elapsed)
+
+
+def configure(base_url, depth, channels):
+    for channel in range(1, channels + 1):
+        response = requests.post(
+            f"{base_url}/channel/{channel}",
+            json={"channel": channel, "scale": 1.0, "coupling": "DC", "display": True}
+        )
+        response.raise_for_status()
+    response = requests.post(f"{base_url}/acquisition", json={"points": depth})
+    response.raise_for_status()
+
+
+def bench_data(base_url, depth, channels, clients, iterations):
+    """Raw /data/{channel} throughput: one request fetches every enabled channel in turn."""
+    def operation():
+        size = 0
+        for channel in range(1, channels + 1):
+            response = requests.get(f"{base_url}/data/{channel}", params={"points": depth})
+            response.raise_for_status()
+            size += len(response.content)
+        return size
+
+    return run_clients(operation, clients, iterations)
+
+
+def bench_capture(base_url, pressure_url, depth, channels, clients, iterations, workdir):
+    """Full OscilloscopeMeasurement.save_capture path, including pressure and CSV writing."""
+    with open("config.yaml", 'r') as f:
+        config = yaml.safe_load(f)
+    config = copy.deepcopy(config)
+    config['oscilloscope']['save_path'] = str(workdir)
+    config['acquisition']['points'] = depth
+    config['channels'] = [
+        {"number": n, "scale": 1.0, "coupling": "DC", "display": True} for n in range(1, channels + 1)
+    ]
+    config_path = Path(workdir) / "benchmark_config.yaml"
+    with open(config_path, 'w') as f:
+        yaml.dump(config, f)
+
+    lock = threading.Lock()
+    counter = iter(range(clients * iterations))
+
+    def operation():
+        measurement = OscilloscopeMeasurement(config_path)
+        measurement.base_url = base_url
+        measurement.pressure_url = pressure_url
+        with lock:
+            if not hasattr(operation, "run_path"):
+                measurement.setup_folders()
+                operation.run_path = measurement.current_measurement_path
+            capture_num = next(counter)
+        measurement.current_measurement_path = operation.run_path
+        measurement.save_capture(capture_num)
+        # Delete the capture once measured; at 10M points it is hundreds of MB
+        files = list((operation.run_path / "data").glob(f"capture_{capture_num:04d}*"))
+        size = sum(p.stat().st_size for p in files)
+        for p in files:
+            p.unlink()
+        return size
+
+    return run_clients(operation, clients, iterations)
+
+
+def bench_pressure(pressure_url, clients, iterations):
+    def operation():
+        response = requests.get(f"{pressure_url}/pressure")
+        response.raise_for_status()
+        return len(response.content)
+
+    return run_clients(operation, clients, iterations)
+
+
+def result_key(result):
+    return (result["scenario"], result.get("depth"), result.get("channels"),
+            result.get("format"), result["clients"])
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r') as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    print(f"\nComparison against {baseline_path}:")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if not previous:
+            continue
+        rate = result["captures_per_s"] / previous["captures_per_s"]
+        p50 = result["latency_ms"]["p50"] / previous["latency_ms"]["p50"]
+        print(f"  {result_key(result)}: captures/s x{rate:.2f}, p50 latency x{p50:.2f}")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def main_benchmark(args):
+    servers = []
+    if args.base_url:
+        base_url, pressure_url = args.base_url, args.pressure_url
+    else:
+        # In-process mode: the FastAPI apps run in background threads against stand-in devices
+        main.osci_connection = FakeScope()
+        main.osci_address = "benchmark"
+        preassure_main.pressure_connection = FakeGauge()
+        servers.append(start_server(main.app, args.port))
+        servers.append(start_server(preassure_main.app, args.port + 1))
+        base_url = f"http://127.0.0.1:{args.port}"
+        pressure_url = f"http://127.0.0.1:{args.port + 1}"
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for fmt in args.formats:
+                for depth in args.depths:
+                    iterations = args.large_iterations if depth >= LARGE_DEPTH else args.iterations
+                    for channels in args.channels:
+                        configure(base_url, depth, channels)
+                        for clients in args.clients:
+                            for scenario in args.scenarios:
+                                if scenario == "pressure":
+                                    continue
+                                print(f"{scenario}: depth={depth} channels={channels} format={fmt} clients={clients}")
+                                if scenario == "data":
+                                    stats = bench_data(base_url, depth, channels, clients, iterations)
+                                else:
+                                    stats = bench_capture(base_url, pressure_url, depth, channels,
+                                                          clients, iterations, workdir)
+                                results.append({"scenario": scenario, "depth": depth, "channels": channels,
+                                                "format": fmt, "clients": clients, "iterations": iterations,
+                                                **stats})
+            if "pressure" in args.scenarios:
+                for clients in args.clients:
+                    print(f"pressure: clients={clients}")
+                    stats = bench_pressure(pressure_url, clients, args.iterations)
+                    results.append({"scenario": "pressure", "clients": clients,
+                                    "iterations": args.iterations, **stats})
+    finally:
+        for server, thread in servers:
+            server.should_exit = True
+            thread.join()
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "mode": "remote" if args.base_url else "in-process",
+        "iterations": args.iterations,
+        "large_iterations": args.large_iterations,
+        "results": results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Throughput benchmark for the acquisition stack",
+        epilog="The default matrix takes well over an hour: in-process, one /data fetch takes "
+               "about 4 s at 1M points and about 40 s at 10M. For a quick run use e.g. "
+               "--depths 10000 100000 --channels 1 --clients 1."
+    )
+    parser.add_argument("--scenarios", nargs="+", default=["data", "capture", "pressure"],
+                        choices=["data", "capture", "pressure"])
+    parser.add_argument("--depths", nargs="+", type=int, default=DEFAULT_DEPTHS)
+    parser.add_argument("--channels", nargs="+", type=int, default=DEFAULT_CHANNELS)
+    parser.add_argument("--clients", nargs="+", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--formats", nargs="+", default=DEFAULT_FORMATS, choices=DEFAULT_FORMATS)
+    parser.add_argument("--iterations", type=int, default=5, help="operations per client")
+    parser.add_argument("--large-iterations", type=int, default=1,
+                        help=f"operations per client at depths of {LARGE_DEPTH} points and above")
+    parser.add_argument("--port", type=int, default=8100, help="first port for in-process servers")
+    parser.add_argument("--base-url", help="benchmark a running scope server instead of in-process")
+    parser.add_argument("--pressure-url", default="http://localhost:8001")
+    parser.add_argument("--output", default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    main_benchmark(parser.parse_args())
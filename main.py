@@ -4,11 +4,30 @@ import pyvisa
 from typing import List, Optional
 import uvicorn
 from datetime import datetime
+import time
 
 app = FastAPI()
 
 # Global oscilloscope connection
 osci_connection = None
+osci_address = None
+osci_reconnects = 0  # successful reconnects, lets routes tell the client a reconnect happened
+
+# Last write per SCPI header, replayed after a reconnect
+osci_settings = {}
+
+# Reconnect behaviour when the scope drops off the network
+RECONNECT_ATTEMPTS = 5
+RECONNECT_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+# Send consecutive commands as one ';'-joined message. Set to False for instruments
+# whose parser does not accept compound messages.
+SCPI_JOIN_COMMANDS = True
+
+# Writes that are not configuration and must not be replayed after a reconnect.
+# Re-arming (:SING) would discard a waveform already in memory; /trigger/status
+# reports "reconnected" instead so the client can re-arm.
+NOT_REPLAYED = (':SING', ':WAV:', '*')
 
 # Data Models
 class ConnectRequest(BaseModel):
@@ -32,15 +51,177 @@ class TimebaseConfig(BaseModel):
 class AcquisitionConfig(BaseModel):
     points: int  # memory depth points
 
+class ScopeConfig(BaseModel):
+    # Sections left out are not sent to the scope
+    channels: List[ChannelConfig] = []
+    acquisition: Optional[AcquisitionConfig] = None
+    timebase: Optional[TimebaseConfig] = None
+    trigger: Optional[TriggerConfig] = None
+
+class ScpiCommand(BaseModel):
+    command: str
+    query: Optional[bool] = None  # inferred from a trailing '?' when not given
+
+class ScpiBatchRequest(BaseModel):
+    commands: List[ScpiCommand]
+
+def open_connection(ip_address):
+    rm = pyvisa.ResourceManager('@py')
+    connection = rm.open_resource(f'TCPIP::{ip_address}::INSTR')
+    connection.timeout = 5000
+    connection.read_termination = '\n'
+    connection.write_termination = '\n'
+    return connection
+
+def is_query(command):
+    return command.query if command.query is not None else command.command.strip().endswith('?')
+
+def scpi_header(command):
+    """Short-form header of a command, e.g. ':CHANnel1:SCALe 2.0' -> ':CHAN1:SCAL'."""
+    nodes = []
+    for node in command.split()[0].split(':'):
+        if node != node.upper() and node != node.lower():
+            # Mixed-case long form: the upper-case letters are the short form
+            node = ''.join(c for c in node if c.isupper() or c.isdigit())
+        nodes.append(node.upper())
+    return ':'.join(nodes)
+
+def remember_setting(command):
+    # Only writes that set a value are configuration; bare actions such as :RUN,
+    # :AUToscale or :CLEar must never be replayed
+    if command.startswith(NOT_REPLAYED) or len(command.split()) < 2:
+        return
+    header = scpi_header(command)
+    # Re-insert so replay follows the order in which values were last applied
+    osci_settings.pop(header, None)
+    osci_settings[header] = command
+
+def writes(*commands):
+    return [ScpiCommand(command=command, query=False) for command in commands]
+
+def execute_batch(commands, results=None):
+    """Send commands in as few round trips as possible and return one result per command.
+
+    Consecutive writes are joined with ';' and sent together with the query that
+    follows them, so each query costs one round trip and trailing writes one more.
+    Results are appended to the given list as each round trip completes, so a caller
+    can see how far a failed batch got.
+    """
+    results = [] if results is None else results
+    round_trip = 0
+
+    def send(group):
+        nonlocal round_trip
+        message = ';'.join(command.command for command in group)
+        query = is_query(group[-1])
+        start = time.perf_counter()
+        response = osci_connection.query(message).strip() if query else osci_connection.write(message)
+        elapsed = time.perf_counter() - start
+        for command in group:
+            if not is_query(command):
+                remember_setting(command.command)
+            results.append({
+                "command": command.command,
+                "response": response if command is group[-1] and query else None,
+                "round_trip": round_trip,
+                "elapsed": elapsed
+            })
+        round_trip += 1
+
+    pending = []
+    for command in commands:
+        pending.append(command)
+        if is_query(command) or not SCPI_JOIN_COMMANDS:
+            send(pending)
+            pending = []
+    if pending:
+        send(pending)
+    return results
+
+def channel_commands(channel_id, config):
+    return writes(
+        f":CHANnel{channel_id}:DISPlay {'ON' if config.display else 'OFF'}",
+        f":CHANnel{channel_id}:SCALe {config.scale}",
+        f":CHANnel{channel_id}:COUPling {config.coupling}"
+    )
+
+def trigger_commands(config):
+    commands = writes(
+        f':TRIG:EDGE:SOURce CHAN{config.source}',
+        f':TRIG:EDGE:LEV {config.level}',
+        f':TRIG:SWE {config.mode}'
+    )
+    if config.mode == "SING":
+        commands += writes(':SING')
+    return commands
+
+def timebase_commands(config):
+    return writes(
+        f':TIMebase:MAIN:SCALe {config.scale}',
+        f':TIMebase:MAIN:OFFSet {config.offset}'
+    )
+
+def acquisition_commands(config):
+    return writes(f':ACQuire:MDEPth {config.points}')
+
+def scope_commands(config):
+    # Channels, acquisition, timebase and trigger last, as the measurement client expects
+    commands = []
+    for channel in config.channels:
+        commands += channel_commands(channel.channel, channel)
+    if config.acquisition:
+        commands += acquisition_commands(config.acquisition)
+    if config.timebase:
+        commands += timebase_commands(config.timebase)
+    if config.trigger:
+        commands += trigger_commands(config.trigger)
+    return commands
+
+def replay_settings():
+    # Cached writes are ordered by when they were last applied
+    execute_batch(writes(*osci_settings.values()))
+
+def reconnect_oscilloscope():
+    """Re-open the VISA session with exponential backoff and replay the cached configuration."""
+    global osci_connection, osci_reconnects
+    delay = RECONNECT_BACKOFF
+    last_error = None
+    for attempt in range(RECONNECT_ATTEMPTS):
+        try:
+            try:
+                osci_connection.close()
+            except Exception:
+                pass
+            osci_connection = open_connection(osci_address)
+            osci_connection.query('*IDN?')
+            replay_settings()
+            osci_reconnects += 1
+            print(f"Reconnected to oscilloscope at {osci_address} (attempt {attempt + 1})")
+            return
+        except Exception as e:
+            last_error = e
+            print(f"Reconnect attempt {attempt + 1}/{RECONNECT_ATTEMPTS} failed: {str(e)}")
+            if attempt < RECONNECT_ATTEMPTS - 1:
+                time.sleep(delay)
+                delay *= 2
+    raise last_error
+
+def with_reconnect(operation):
+    """Run operation(); on an I/O fault re-open the session once and retry."""
+    try:
+        return operation()
+    except (pyvisa.errors.VisaIOError, OSError):
+        reconnect_oscilloscope()
+        return operation()
+
 @app.post("/connect")
 async def connect_oscilloscope(request: ConnectRequest):  # Changed to use request body
-    global osci_connection
+    global osci_connection, osci_address
     try:
-        rm = pyvisa.ResourceManager('@py')
-        osci_connection = rm.open_resource(f'TCPIP::{request.ip_address}::INSTR')
-        osci_connection.timeout = 5000
-        osci_connection.read_termination = '\n'
-        osci_connection.write_termination = '\n'
+        osci_connection = open_connection(request.ip_address)
+        osci_address = request.ip_address
+        # Settings from a previous session must not be replayed on this one
+        osci_settings.clear()
         idn = osci_connection.query('*IDN?')
         return {"status": "connected", "device": idn}
     except Exception as e:
@@ -52,9 +233,7 @@ async def configure_channel(channel_id: int, config: ChannelConfig):
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
     try:
-        osci_connection.write(f":CHANnel{channel_id}:DISPlay {'ON' if config.display else 'OFF'}")
-        osci_connection.write(f":CHANnel{channel_id}:SCALe {config.scale}")
-        osci_connection.write(f":CHANnel{channel_id}:COUPling {config.coupling}")
+        with_reconnect(lambda: execute_batch(channel_commands(channel_id, config)))
         return {"status": "success", "channel": channel_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -65,11 +244,7 @@ async def configure_trigger(config: TriggerConfig):
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
     try:
-        osci_connection.write(f':TRIG:EDGE:SOURce CHAN{config.source}')
-        osci_connection.write(f':TRIG:EDGE:LEV {config.level}')
-        osci_connection.write(f':TRIG:SWE {config.mode}')
-        if config.mode == "SING":
-            osci_connection.write(':SING')
+        with_reconnect(lambda: execute_batch(trigger_commands(config)))
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -80,8 +255,10 @@ async def get_trigger_status():
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
     try:
-        status = osci_connection.query(':TRIG:STAT?').strip()
-        return {"status": status}
+        reconnects = osci_reconnects
+        status = with_reconnect(lambda: osci_connection.query(':TRIG:STAT?')).strip()
+        # After a reconnect the scope is not armed and a STOP may be stale
+        return {"status": status, "monotonic": time.monotonic(), "reconnected": osci_reconnects != reconnects}
     except Exception as e:
         if "socket.timeout" in str(e):
             raise HTTPException(status_code=500, detail="Timeout error: Oscilloscope not responding. Check network connection and oscilloscope status.")
@@ -94,8 +271,7 @@ async def configure_timebase(config: TimebaseConfig):
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
     try:
-        osci_connection.write(f':TIMebase:MAIN:SCALe {config.scale}')
-        osci_connection.write(f':TIMebase:MAIN:OFFSet {config.offset}')
+        with_reconnect(lambda: execute_batch(timebase_commands(config)))
         return {
             "status": "success",
             "scale": config.scale,
@@ -110,7 +286,7 @@ async def configure_acquisition(config: AcquisitionConfig):
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
     try:
-        osci_connection.write(f':ACQuire:MDEPth {config.points}')
+        with_reconnect(lambda: execute_batch(acquisition_commands(config)))
         return {
             "status": "success",
             "points": config.points
@@ -123,30 +299,78 @@ async def get_channel_data(channel_id: int, points: Optional[str] = "max"):
     global osci_connection
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
-    try:
-        osci_connection.write(f':WAV:SOUR CHAN{channel_id}')
-        osci_connection.write(':WAV:MODE RAW')
-        osci_connection.write(f':WAV:POIN {points}')
-        osci_connection.write(':WAV:FORM ASC')
+    def read_waveform():
+        commands = writes(
+            f':WAV:SOUR CHAN{channel_id}',
+            ':WAV:MODE RAW',
+            f':WAV:POIN {points}',
+            ':WAV:FORM ASC'
+        )
+        commands += [ScpiCommand(command=':WAV:XINC?'), ScpiCommand(command=':WAV:DATA?')]
+        results = execute_batch(commands)
+        # When the transfer finished, not when the waveform was acquired (that is the trigger)
+        transferred = time.monotonic()
+        return results[-1]["response"], float(results[-2]["response"]), transferred
 
-        data = osci_connection.query(':WAV:DATA?')
-        time_step = float(osci_connection.query(':WAV:XINC?'))
+    try:
+        data, time_step, transferred = with_reconnect(read_waveform)
 
         return {
             "time_step": time_step,
+            "transfer_monotonic": transferred,
             "data": [float(x) for x in data.split(',') if x.strip()]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/configure")
+async def configure_scope(config: ScopeConfig):
+    global osci_connection
+    if not osci_connection:
+        raise HTTPException(status_code=400, detail="Oscilloscope not connected")
+    try:
+        results = with_reconnect(lambda: execute_batch(scope_commands(config)))
+        return {
+            "status": "success",
+            "round_trips": results[-1]["round_trip"] + 1 if results else 0
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/scpi/batch")
+async def scpi_batch(batch: ScpiBatchRequest):
+    global osci_connection
+    if not osci_connection:
+        raise HTTPException(status_code=400, detail="Oscilloscope not connected")
+    if any(not command.command.strip() for command in batch.commands):
+        raise HTTPException(status_code=400, detail="Empty SCPI command in batch")
+    # Raw batches are not retried after a fault: they may contain actions such as
+    # :CLEar or *RST that must not run twice, and a query the scope cannot answer
+    # times out just like a dropped connection. The next configuration or status
+    # request reconnects if the session really is gone.
+    results = []
+    start = time.perf_counter()
+    try:
+        execute_batch(batch.commands, results)
+        return {
+            "status": "success",
+            "round_trips": results[-1]["round_trip"] + 1 if results else 0,
+            "elapsed": time.perf_counter() - start,
+            "results": results
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"error": str(e), "results": results})
+
 @app.post("/disconnect")
 async def disconnect_oscilloscope():
-    global osci_connection
+    global osci_connection, osci_address
     if not osci_connection:
         raise HTTPException(status_code=400, detail="Oscilloscope not connected")
     try:
         osci_connection.close()
         osci_connection = None
+        osci_address = None
+        osci_settings.clear()
         return {"status": "disconnected"}
     except Exception as e:
         if "socket.timeout" in str(e):
@@ -94,6 +94,9 @@ async def get_pressure():
 
         # Send ENQ to get data
         pressure_connection.write_raw(b'\x05')  # ENQ character
+        # The gauge answers the ENQ with its current reading, so this is the sample time.
+        # System-wide monotonic clock, comparable with the scope server on the same host
+        sample_time = time.monotonic()
         time.sleep(0.2)
 
         # Read pressure data
@@ -114,6 +117,7 @@ async def get_pressure():
 
         return {
             "timestamp": datetime.now().isoformat(),
+            "monotonic": sample_time,
             "pressure": pressure_value,
             "units": "mbar"
         }
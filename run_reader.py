@@ -0,0 +1,165 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# float32 cannot represent every 7-significant-digit value the CSV holds, so keep
+# float64; the sidecar is still smaller than the text it replaces
+SIDECAR_DTYPE = np.float64
+
+
+def read_csv_capture(csv_file):
+    """Parse a capture CSV into a (channels, samples) array, dropping the Time column."""
+    try:
+        values = np.loadtxt(csv_file, delimiter=',', skiprows=1, dtype=np.float64, ndmin=2)
+    except ValueError:
+        # Channels shorter than the longest one are padded with empty fields
+        values = np.genfromtxt(csv_file, delimiter=',', skip_header=1, dtype=np.float64, ndmin=2)
+    # C order keeps each channel's samples contiguous on disk, so reading one channel
+    # from the memory map touches only that channel's pages
+    return np.ascontiguousarray(values[:, 1:].T, dtype=SIDECAR_DTYPE)
+
+
+def load_capture(csv_file):
+    """Return a read-only memory map of a capture, converting the CSV to a .npy sidecar once."""
+    csv_file = Path(csv_file)
+    sidecar = csv_file.with_suffix('.npy')
+    if sidecar.exists() and sidecar.stat().st_mtime >= csv_file.stat().st_mtime:
+        data = np.load(sidecar, mmap_mode='r')
+        # Sidecars written by older versions (float32, Fortran order) are regenerated
+        if data.dtype == SIDECAR_DTYPE and data.flags.c_contiguous:
+            return data
+    data = read_csv_capture(csv_file)
+    # Write to a temporary file first so an interrupted conversion is never picked up
+    temp_file = sidecar.with_suffix('.npy.tmp')
+    with open(temp_file, 'wb') as f:
+        np.save(f, data)
+    os.replace(temp_file, sidecar)
+    return np.load(sidecar, mmap_mode='r')
+
+
+class CaptureArray:
+    """Lazy (captures, channels, samples) view over the captures of a run.
+
+    Indexing with a capture number returns that capture's memory map. Slices, lists
+    of captures and np.asarray() stack the selected captures into a regular in-memory
+    array, so on a large run iterate or index single captures instead of data[:].
+    Only the captures touched are converted or read. The shape is taken from the first capture; stacking a
+    capture with a different shape (e.g. a channel fetch failed while recording)
+    raises ValueError.
+    """
+
+    def __init__(self, csv_files):
+        self.csv_files = list(csv_files)
+        self._shape = None
+
+    @property
+    def shape(self):
+        if self._shape is None:
+            channels, samples = self[0].shape if self.csv_files else (0, 0)
+            self._shape = (len(self.csv_files), channels, samples)
+        return self._shape
+
+    @property
+    def dtype(self):
+        return np.dtype(SIDECAR_DTYPE)
+
+    def __len__(self):
+        return len(self.csv_files)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        rest = ()
+        if isinstance(index, tuple):
+            index, rest = index[0], index[1:]
+        if isinstance(index, (int, np.integer)):
+            return load_capture(self.csv_files[index])[rest]
+        captures = range(len(self))[index] if isinstance(index, slice) else index
+        arrays = []
+        for i in captures:
+            capture = load_capture(self.csv_files[i])
+            if capture.shape != self.shape[1:]:
+                raise ValueError(
+                    f"{self.csv_files[i].name} has shape {capture.shape} (channels, samples) but the run "
+                    f"has {self.shape[1:]}; index it on its own instead of stacking"
+                )
+            arrays.append(capture[rest])
+        return np.stack(arrays)
+
+    def __array__(self, dtype=None):
+        data = self[:]
+        return data.astype(dtype) if dtype is not None else data
+
+
+class Run:
+    """Recorded run folder (run_XXX) as written by OscilloscopeMeasurement."""
+
+    def __init__(self, run_path):
+        self.path = Path(run_path)
+        data_dir = self.path / "data"
+        if not data_dir.is_dir():
+            raise ValueError(f"{run_path} is not a measurement run folder")
+
+        self.csv_files = sorted(data_dir.glob("capture_[0-9][0-9][0-9][0-9].csv"))
+        self.data = CaptureArray(self.csv_files)
+        self.readme = self._load_json(self.path / "README.json")
+        self.gap_info = self._load_json(self.path / "gap_info.json")
+        self._metadata = {}
+
+        # Channel numbers from the CSV header, e.g. "Time,Channel_1,Channel_2"
+        self.channels = []
+        if self.csv_files:
+            with open(self.csv_files[0], 'r') as f:
+                header = f.readline().strip().split(',')
+            self.channels = [int(name.split('_')[1]) for name in header[1:]]
+
+    @staticmethod
+    def _load_json(path):
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def __len__(self):
+        return len(self.csv_files)
+
+    def metadata(self, capture):
+        """Metadata JSON of the capture at the given position in the run."""
+        if capture not in self._metadata:
+            csv_file = self.csv_files[capture]
+            self._metadata[capture] = self._load_json(csv_file.with_name(f"{csv_file.stem}_metadata.json"))
+        return self._metadata[capture]
+
+    def time_axis(self, capture=0):
+        """Sample times in seconds, using the first channel's time step like the CSV does."""
+        metadata = self.metadata(capture)
+        if metadata and metadata.get("channels"):
+            time_step = next(iter(metadata["channels"].values()))["time_step"]
+        else:
+            # No metadata file: take the step from the CSV's Time column
+            with open(self.csv_files[capture], 'r') as f:
+                f.readline()
+                times = [float(f.readline().split(',')[0]) for _ in range(2)]
+            time_step = times[1] - times[0]
+        return np.arange(self.data[capture].shape[1]) * time_step
+
+    def convert(self):
+        """Convert every capture to its binary sidecar up front."""
+        for csv_file in self.csv_files:
+            load_capture(csv_file)
+
+
+def open_run(run_path):
+    return Run(run_path)
+
+
+if __name__ == "__main__":
+    run = open_run(sys.argv[1])
+    print(f"Converting {len(run)} captures in {run.path}...")
+    run.convert()
+    print(f"Shape (captures, channels, samples): {run.data.shape}, channels: {run.channels}")
@@ -0,0 +1,217 @@
+import argparse
+import copy
+import itertools
+import time
+import yaml
+from pathlib import Path
+from automated_measurement import OscilloscopeMeasurement
+
+# Rough seconds the scope needs to apply a change of each key group. Changing the
+# memory depth resets the acquisition system, so it is by far the most expensive.
+RECONFIGURATION_COST = {
+    "acquisition": 5.0,
+    "timebase": 0.5,
+    "channels": 0.2,
+    "trigger": 0.1,
+    "measurement": 0.0,
+}
+DEFAULT_COST = 0.2
+
+# Used for the runtime estimate only
+SETUP_TIME = 3.0            # connect + full configure_scope, once per sweep
+BYTES_PER_POINT = 14        # ASCII sample ("-1.234567e+00,")
+TRANSFER_RATE = 5e6         # bytes/s from the scope over the network
+PRESSURE_TIME = 0.4         # fixed serial delays in the pressure server
+
+
+def get_value(config, key):
+    parts = key.split('.')
+    if parts[0] == 'channels':
+        # channels.<number>.<field> addresses the channel with that number
+        channel = next((ch for ch in config['channels'] if ch['number'] == int(parts[1])), None)
+        if channel is None:
+            raise ValueError(f"Sweep key {key} refers to a channel that is not configured")
+        return channel.get(parts[2])
+    node = config
+    for part in parts:
+        node = node.get(part) if isinstance(node, dict) else None
+    return node
+
+
+def set_value(config, key, value):
+    parts = key.split('.')
+    if parts[0] == 'channels':
+        channel = next((ch for ch in config['channels'] if ch['number'] == int(parts[1])), None)
+        if channel is None:
+            raise ValueError(f"Sweep key {key} refers to a channel that is not configured")
+        channel[parts[2]] = value
+        return
+    node = config
+    for part in parts[:-1]:
+        node = node.setdefault(part, {})
+    node[parts[-1]] = value
+
+
+def key_cost(key):
+    return RECONFIGURATION_COST.get(key.split('.')[0], DEFAULT_COST)
+
+
+def transition_cost(previous, current):
+    """Cost of reconfiguring the scope from one set of sweep coordinates to the next.
+
+    Both must be effective coordinates (see fill_coordinates) so a key that is only
+    set in one of them is still counted.
+    """
+    if previous is None:
+        return 0.0
+    return sum(key_cost(key) for key in current if previous.get(key) != current[key])
+
+
+def fill_coordinates(coordinates, base_config):
+    """Give every run a value for every swept key, taking missing ones from the base config.
+
+    In list mode a key set in one run but not the next reverts to its base value, which
+    is a real change on the scope.
+    """
+    keys = list(dict.fromkeys(key for coords in coordinates for key in coords))
+    for key in keys:
+        if any(key not in coords for coords in coordinates) and get_value(base_config, key) is None:
+            raise ValueError(f"Sweep key {key} is not set in every run and has no value in the base config")
+    return [{key: coords[key] if key in coords else get_value(base_config, key) for key in keys}
+            for coords in coordinates]
+
+
+def expand_sweep(sweep):
+    """Return the list of sweep coordinates described by the sweep section of the config."""
+    mode = sweep.get('mode', 'cartesian')
+    if mode == 'cartesian':
+        parameters = sweep.get('parameters') or {}
+        if not parameters:
+            raise ValueError("Cartesian sweep needs at least one entry under sweep.parameters")
+        keys = list(parameters)
+        return [dict(zip(keys, values)) for values in itertools.product(*(parameters[k] for k in keys))]
+    if mode == 'list':
+        runs = sweep.get('runs') or []
+        if not runs:
+            raise ValueError("List sweep needs at least one entry under sweep.runs")
+        return [dict(run) for run in runs]
+    raise ValueError(f"Unknown sweep mode: {mode}")
+
+
+def plan_runs(coordinates):
+    """Order the runs to keep expensive reconfigurations rare.
+
+    Starts from the first listed run and then greedily picks the cheapest next
+    transition (ties keep the listed order), so e.g. all runs at one memory depth
+    are grouped together.
+    """
+    remaining = list(coordinates)
+    plan = [remaining.pop(0)]
+    while remaining:
+        index = min(range(len(remaining)), key=lambda i: transition_cost(plan[-1], remaining[i]))
+        plan.append(remaining.pop(index))
+    return plan
+
+
+def estimate_run_time(config):
+    measurement = config['measurement']
+    channels = sum(1 for ch in config['channels'] if ch['display'])
+    transfer = channels * config['acquisition']['points'] * BYTES_PER_POINT / TRANSFER_RATE
+    per_capture = max(transfer, PRESSURE_TIME)
+    return measurement['captures'] * per_capture + (measurement['captures'] - 1) * measurement['interval']
+
+
+def build_run_config(base_config, coords):
+    run_config = copy.deepcopy(base_config)
+    for key, value in coords.items():
+        set_value(run_config, key, value)
+    # Tag the run so README.json records where it sits in the sweep
+    run_config['sweep_coordinates'] = coords
+    return run_config
+
+
+def run_sweep(config_path, dry_run=False):
+    with open(config_path, 'r') as f:
+        sweep_config = yaml.safe_load(f)
+
+    if 'sweep' not in sweep_config:
+        raise ValueError("No sweep defined in configuration file")
+
+    base_config = copy.deepcopy(sweep_config)
+    sweep = base_config.pop('sweep')
+    settle_time = sweep.get('settle_time', 5)
+
+    plan = plan_runs(fill_coordinates(expand_sweep(sweep), base_config))
+    run_configs = [build_run_config(base_config, coords) for coords in plan]
+
+    # Estimate total runtime up front. The scope session is kept open across the
+    # sweep, so after the first run only the changed settings cost time.
+    total = SETUP_TIME
+    previous = None
+    print(f"Planned {len(plan)} runs:")
+    for i, (coords, run_config) in enumerate(zip(plan, run_configs)):
+        run_time = estimate_run_time(run_config) + transition_cost(previous, coords)
+        total += run_time + (settle_time if i < len(plan) - 1 else 0)
+        print(f"  {i+1:3d}. {coords}  (~{run_time:.0f} s)")
+        previous = coords
+    print(f"Estimated total runtime: {total / 60:.1f} min")
+
+    if dry_run:
+        return
+
+    measurement = None
+    previous_config = None
+    try:
+        for i, (coords, run_config) in enumerate(zip(plan, run_configs)):
+            print(f"\n=== Running sweep point {i+1}/{len(plan)}: {coords} ===")
+
+            # Create a temporary config file for this run
+            temp_config_path = f"temp_sweep_config_{i+1}.yaml"
+            with open(temp_config_path, 'w') as f:
+                yaml.dump(run_config, f)
+            try:
+                measurement = OscilloscopeMeasurement(temp_config_path)
+            finally:
+                Path(temp_config_path).unlink(missing_ok=True)
+
+            measurement.setup_folders()
+            measurement.save_config()
+            measurement.validate_channels()
+
+            if previous_config is None:
+                print("Connecting to oscilloscope and pressure device...")
+                measurement.connect_scope()
+                measurement.connect_pressure_device()
+
+            # Only the settings that differ from the previous run are sent to the scope
+            print("Configuring scope...")
+            measurement.configure_scope(previous_config)
+            previous_config = run_config
+
+            try:
+                measurement.run_captures()
+            except Exception:
+                print(f"Sweep interrupted. Resume this run with: python automated_measurement.py {measurement.current_measurement_path}")
+                raise
+
+            # Wait between runs to let things settle
+            if i < len(plan) - 1:
+                print(f"Waiting {settle_time} seconds before next run...")
+                time.sleep(settle_time)
+    finally:
+        if measurement:
+            print("Disconnecting from oscilloscope...")
+            measurement.disconnect_scope()
+
+            print("Disconnecting from pressure device...")
+            measurement.disconnect_pressure_device()
+
+    print("\nAll sweep measurements completed!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a parameter sweep defined in a config file")
+    parser.add_argument("config", nargs="?", default="sweep_config.yaml")
+    parser.add_argument("--dry-run", action="store_true", help="only print the run plan and estimate")
+    args = parser.parse_args()
+    run_sweep(args.config, args.dry_run)
@@ -0,0 +1,160 @@
+import json
+
+import pytest
+import yaml
+from fastapi.testclient import TestClient
+
+import main
+from automated_measurement import OscilloscopeMeasurement
+from benchmark import FakeScope
+
+
+class RecordingScope:
+    """Wraps a FakeScope, remembers every message and can drop off the network."""
+
+    def __init__(self, fail_queries=0):
+        self.fake = FakeScope()
+        self.messages = []
+        self.fail_queries = fail_queries
+
+    def write(self, message):
+        self.messages.append(message)
+        self.fake.write(message)
+
+    def query(self, message):
+        if self.fail_queries:
+            self.fail_queries -= 1
+            raise ConnectionResetError("scope dropped off the network")
+        self.messages.append(message)
+        return self.fake.query(message)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Scope server state with a dead session whose reconnect yields a fresh scope."""
+    fresh = RecordingScope()
+    monkeypatch.setattr(main, "osci_connection", RecordingScope(fail_queries=1))
+    monkeypatch.setattr(main, "osci_address", "192.168.0.90")
+    monkeypatch.setattr(main, "osci_settings", {})
+    monkeypatch.setattr(main, "open_connection", lambda ip_address: fresh)
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+    return fresh
+
+
+def test_reconnect_replays_settings_without_arming(server):
+    main.osci_settings.update({
+        ':ACQ:MDEP': ':ACQuire:MDEPth 1000',
+        ':TRIG:EDGE:LEV': ':TRIG:EDGE:LEV 1.6',
+    })
+    reconnects = main.osci_reconnects
+
+    status = main.with_reconnect(lambda: main.osci_connection.query(':TRIG:STAT?'))
+
+    assert status == "STOP"
+    assert server.messages == ['*IDN?', ':ACQuire:MDEPth 1000;:TRIG:EDGE:LEV 1.6', ':TRIG:STAT?']
+    assert main.osci_reconnects == reconnects + 1
+
+
+def test_reconnect_gives_up_without_sleeping_after_last_attempt(monkeypatch):
+    def refuse(ip_address):
+        raise ConnectionRefusedError("no route to scope")
+
+    sleeps = []
+    monkeypatch.setattr(main, "osci_connection", RecordingScope())
+    monkeypatch.setattr(main, "open_connection", refuse)
+    monkeypatch.setattr(main.time, "sleep", sleeps.append)
+
+    with pytest.raises(ConnectionRefusedError):
+        main.reconnect_oscilloscope()
+
+    expected = [main.RECONNECT_BACKOFF * 2 ** i for i in range(main.RECONNECT_ATTEMPTS - 1)]
+    assert sleeps == expected
+
+
+def test_trigger_status_reports_reconnect_once(server):
+    client = TestClient(main.app)
+
+    first = client.get("/trigger/status")
+    second = client.get("/trigger/status")
+
+    assert first.status_code == 200
+    assert first.json()["status"] == "STOP"
+    assert first.json()["reconnected"] is True
+    assert second.json()["reconnected"] is False
+
+
+def test_connect_clears_previous_session_settings(server):
+    main.osci_settings[':ACQ:MDEP'] = ':ACQuire:MDEPth 1000'
+
+    response = TestClient(main.app).post("/connect", json={"ip_address": "192.168.0.91"})
+
+    assert response.status_code == 200
+    assert main.osci_settings == {}
+
+
+@pytest.fixture
+def measurement(tmp_path):
+    config = {
+        "oscilloscope": {"ip_address": "192.168.0.90", "save_path": str(tmp_path / "measurements")},
+        "measurement": {"captures": 5, "interval": 0, "gap": 6.0},
+        "channels": [
+            {"number": 1, "scale": 10.0, "coupling": "DC", "display": True},
+            {"number": 2, "scale": 10.0, "coupling": "DC", "display": True},
+        ],
+        "trigger": {"source": 1, "level": 1.6, "mode": "SING"},
+        "timebase": {"scale": 0.000001, "offset": 0.0},
+        "acquisition": {"points": 1000},
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config))
+    measurement = OscilloscopeMeasurement(config_path)
+    measurement.setup_folders()
+    measurement.save_config()
+    measurement.get_pressure_reading = lambda: None
+    measurement.wait_for_trigger = lambda: None
+    return measurement
+
+
+def test_resume_uses_run_configuration_and_checkpoint(measurement, tmp_path):
+    measurement.save_checkpoint(3)
+    edited = dict(measurement.config, acquisition={"points": 5000})
+    edited_path = tmp_path / "edited.yaml"
+    edited_path.write_text(yaml.dump(edited))
+
+    resumed = OscilloscopeMeasurement(edited_path)
+    resumed.resume_folders(measurement.current_measurement_path)
+
+    assert resumed.config["acquisition"] == {"points": 1000}
+    assert resumed.load_checkpoint() == 3
+
+
+def test_resume_continues_at_next_capture(measurement):
+    measurement.save_checkpoint(3)
+    saved = []
+    measurement.save_capture = lambda capture_num, trigger_time: saved.append(capture_num)
+
+    measurement.run_captures(measurement.load_checkpoint())
+
+    assert saved == [3, 4]
+    assert measurement.load_checkpoint() == 5
+
+
+def test_failed_channel_fetch_does_not_advance_checkpoint(measurement):
+    def get_channel_data(channel):
+        if channel['number'] == 2:
+            raise ConnectionResetError("scope dropped off the network")
+        return {"time_step": 1e-9, "transfer_monotonic": 1.0, "data": [0.0, 1.0]}
+
+    measurement.get_channel_data = get_channel_data
+    measurement.save_checkpoint(1)
+
+    with pytest.raises(RuntimeError, match=r"missing channels \[2\]"):
+        measurement.run_captures(1)
+
+    assert measurement.load_checkpoint() == 1
+    assert not list((measurement.current_measurement_path / "data").glob("capture_0001*"))
+    checkpoint = json.loads((measurement.current_measurement_path / "checkpoint.json").read_text())
+    assert checkpoint["next_capture"] == 1
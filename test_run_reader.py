@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+from run_reader import open_run
+
+
+def write_capture(data_dir, capture_num, channels, samples, time_step=1e-9, metadata=True):
+    with open(data_dir / f"capture_{capture_num:04d}.csv", 'w') as f:
+        f.write(','.join(['Time'] + [f'Channel_{n}' for n in channels]) + '\n')
+        for i in range(samples):
+            f.write(','.join([f"{i * time_step:.9e}"] + [f"{9.771234e-4 * n + i * 1e-10:.6e}" for n in channels]) + '\n')
+    if metadata:
+        with open(data_dir / f"capture_{capture_num:04d}_metadata.json", 'w') as f:
+            json.dump({"channels": {f"channel_{channels[0]}": {"time_step": time_step}}}, f)
+
+
+@pytest.fixture
+def run_path(tmp_path):
+    data_dir = tmp_path / "run_001" / "data"
+    data_dir.mkdir(parents=True)
+    return data_dir
+
+
+def test_sidecars_are_c_order_and_keep_csv_values(run_path):
+    write_capture(run_path, 0, [1, 2], 5)
+
+    run = open_run(run_path.parent)
+    capture = run.data[0]
+
+    assert run.data.shape == (1, 2, 5)
+    assert isinstance(capture, np.memmap)
+    assert capture.flags.c_contiguous
+    assert capture[0, 1] == float(f"{9.771234e-4 + 1e-10:.6e}")
+    assert (run_path / "capture_0000.npy").exists()
+
+
+def test_stacking_mismatched_captures_raises(run_path):
+    write_capture(run_path, 0, [1, 2], 5)
+    write_capture(run_path, 1, [1], 5)
+
+    run = open_run(run_path.parent)
+
+    assert run.data[1].shape == (1, 5)
+    with pytest.raises(ValueError, match="capture_0001.csv"):
+        run.data[:]
+
+
+def test_time_axis_without_metadata_uses_csv_time_column(run_path):
+    write_capture(run_path, 0, [1], 4, time_step=2e-9, metadata=False)
+
+    np.testing.assert_allclose(open_run(run_path.parent).time_axis(0), [0, 2e-9, 4e-9, 6e-9])
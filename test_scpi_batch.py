@@ -0,0 +1,111 @@
+import pytest
+
+import main
+from benchmark import FakeScope
+
+
+class RecordingScope:
+    """Wraps a FakeScope and remembers every message sent to it."""
+
+    def __init__(self):
+        self.fake = FakeScope()
+        self.messages = []
+
+    def write(self, message):
+        self.messages.append(message)
+        self.fake.write(message)
+
+    def query(self, message):
+        self.messages.append(message)
+        return self.fake.query(message)
+
+
+@pytest.fixture
+def scope(monkeypatch):
+    scope = RecordingScope()
+    monkeypatch.setattr(main, "osci_connection", scope)
+    monkeypatch.setattr(main, "osci_settings", {})
+    return scope
+
+
+def test_writes_are_joined_with_the_following_query(scope):
+    commands = main.writes(':ACQuire:MDEPth 1000', ':WAV:POIN max')
+    commands += [main.ScpiCommand(command=':WAV:XINC?'), main.ScpiCommand(command='*IDN?')]
+    commands += main.writes(':TRIG:EDGE:LEV 1.0')
+
+    results = main.execute_batch(commands)
+
+    assert scope.messages == [':ACQuire:MDEPth 1000;:WAV:POIN max;:WAV:XINC?', '*IDN?', ':TRIG:EDGE:LEV 1.0']
+    assert [r["round_trip"] for r in results] == [0, 0, 0, 1, 2]
+    assert [r["response"] for r in results] == [None, None, '1e-09', 'BENCHMARK,FakeScope,0,0', None]
+    assert scope.fake.points == 1000
+
+
+def test_commands_are_sent_separately_when_joining_is_disabled(scope, monkeypatch):
+    monkeypatch.setattr(main, "SCPI_JOIN_COMMANDS", False)
+
+    results = main.execute_batch(main.writes(':ACQuire:MDEPth 1000', ':TRIG:EDGE:LEV 1.0'))
+
+    assert scope.messages == [':ACQuire:MDEPth 1000', ':TRIG:EDGE:LEV 1.0']
+    assert [r["round_trip"] for r in results] == [0, 1]
+
+
+def test_only_setting_writes_are_cached_for_replay(scope):
+    main.execute_batch(main.writes(
+        ':RUN', ':AUToscale', ':SING', ':WAV:SOUR CHAN1', '*RST', ':TRIG:EDGE:LEV 1.0'
+    ) + [main.ScpiCommand(command=':TRIG:STAT?')])
+
+    assert list(main.osci_settings.values()) == [':TRIG:EDGE:LEV 1.0']
+
+
+def test_cache_normalises_headers_and_keeps_latest_value_last(scope):
+    main.execute_batch(main.writes(
+        ':CHANnel1:SCALe 1.0', ':TIMebase:MAIN:SCALe 1e-06', ':CHAN1:SCAL 2.0'
+    ))
+
+    assert list(main.osci_settings.items()) == [
+        (':TIM:MAIN:SCAL', ':TIMebase:MAIN:SCALe 1e-06'),
+        (':CHAN1:SCAL', ':CHAN1:SCAL 2.0'),
+    ]
+
+
+def test_scope_commands_follow_client_order(scope):
+    config = main.ScopeConfig(
+        channels=[main.ChannelConfig(channel=1, scale=10.0)],
+        acquisition=main.AcquisitionConfig(points=1000),
+        trigger=main.TriggerConfig(source=1, level=1.6)
+    )
+
+    main.execute_batch(main.scope_commands(config))
+
+    assert scope.messages == [
+        ':CHANnel1:DISPlay ON;:CHANnel1:SCALe 10.0;:CHANnel1:COUPling DC;'
+        ':ACQuire:MDEPth 1000;'
+        ':TRIG:EDGE:SOURce CHAN1;:TRIG:EDGE:LEV 1.6;:TRIG:SWE SING;:SING'
+    ]
+
+
+def test_failed_raw_batch_is_not_retried(scope, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    answer = scope.query
+
+    def query(message):
+        if message.endswith(':FOO?'):
+            scope.messages.append(message)
+            raise ConnectionResetError("no reply")
+        return answer(message)
+
+    def reconnect(ip_address):
+        raise AssertionError("a raw batch must not trigger a reconnect")
+
+    scope.query = query
+    monkeypatch.setattr(main, "open_connection", reconnect)
+
+    response = TestClient(main.app).post("/scpi/batch", json={"commands": [
+        {"command": ":TRIG:EDGE:LEV 1.0"}, {"command": ":TRIG:STAT?"}, {"command": ":CLEar"}, {"command": ":FOO?"}
+    ]})
+
+    assert response.status_code == 500
+    assert scope.messages == [':TRIG:EDGE:LEV 1.0;:TRIG:STAT?', ':CLEar;:FOO?']
+    assert [r["command"] for r in response.json()["detail"]["results"]] == [':TRIG:EDGE:LEV 1.0', ':TRIG:STAT?']
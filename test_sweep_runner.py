@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+import yaml
+
+import automated_measurement
+import sweep_runner
+from automated_measurement import OscilloscopeMeasurement
+
+
+@pytest.fixture
+def base_config():
+    with open("sweep_config.yaml", 'r') as f:
+        config = yaml.safe_load(f)
+    del config['sweep']
+    return config
+
+
+def test_list_mode_key_reverts_to_base_value(base_config):
+    coordinates = sweep_runner.fill_coordinates(
+        [{'timebase.scale': 1e-6, 'trigger.level': 1.0}, {'timebase.scale': 1e-5}], base_config
+    )
+
+    assert coordinates[1] == {'timebase.scale': 1e-5, 'trigger.level': 1.6}
+    assert sweep_runner.transition_cost(*coordinates) == pytest.approx(0.6)
+
+
+def test_list_mode_key_without_base_value_is_rejected(base_config):
+    with pytest.raises(ValueError, match="measurement.max_status_errors"):
+        sweep_runner.fill_coordinates([{'measurement.max_status_errors': 5}, {}], base_config)
+
+
+class FakeResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"status": "success"}
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+    monkeypatch.setattr(automated_measurement.requests, "post",
+                        lambda url, json: sent.append(json) or FakeResponse())
+    return sent
+
+
+def make_measurement(tmp_path, config):
+    config_path = tmp_path / "run.yaml"
+    config_path.write_text(yaml.dump(config))
+    return OscilloscopeMeasurement(config_path)
+
+
+def test_configure_scope_sends_only_changes(tmp_path, base_config, sent):
+    previous = copy.deepcopy(base_config)
+    sweep_runner.set_value(base_config, 'channels.1.scale', 20.0)
+
+    make_measurement(tmp_path, base_config).configure_scope(previous)
+
+    assert sent == [{"channels": [{"channel": 1, "scale": 20.0, "coupling": "DC", "display": True}]}]
+
+
+def test_configure_scope_sends_everything_after_depth_change(tmp_path, base_config, sent):
+    previous = copy.deepcopy(base_config)
+    sweep_runner.set_value(base_config, 'acquisition.points', 1000000)
+
+    make_measurement(tmp_path, base_config).configure_scope(previous)
+
+    assert len(sent[0]["channels"]) == len(base_config['channels'])
+    assert set(sent[0]) == {"channels", "acquisition", "timebase", "trigger"}